@@ -14,15 +14,38 @@ from pathlib import Path
 import json
 import shutil
 import os
-import threading
-import time
 import itertools
+import time
+import functools
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+# ---------------- Optional Dependencies ----------------
+# orjson is used for vcpkg.json round-trips when installed; stdlib json is the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # ---------------- Global Configuration ----------------
 VCPKG_REPO = "https://github.com/microsoft/vcpkg"
 PAIN_DIR = Path.home() / ".pain"
 GLOBAL_VCPKG_PATH = PAIN_DIR / "vcpkg"
 
+# Host platform, resolved once (it cannot change during a run)
+_SYSTEM = platform.system()
+_IS_WINDOWS = _SYSTEM == "Windows"
+
+# Pre-compiled patterns (project names, the CMake project() declaration, tool versions)
+_NAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+_PROJECT_RE = re.compile(r'project\((\w+)\)')
+_VERSION_RE = re.compile(r'(\d+)\.(\d+)')
+
+# Directories of the vcpkg repo PAIN actually needs (top-level files are always included).
+# versions/ is the builtin version database used by builtin-baseline, version>= and overrides.
+VCPKG_SPARSE_DIRS = ["scripts", "triplets", "ports", "versions"]
+
 # ---------------- Terminal Output Formatting ----------------
 # ANSI Escape Codes for terminal colors
 C_RESET  = "\033[0m"
@@ -38,61 +61,102 @@ STATUS_INFO = f"{C_CYAN}[INFO]{C_RESET}"
 STATUS_WARN = f"{C_YELLOW}[WARN]{C_RESET}"
 
 # ---------------- Library Registry ----------------
+class LibEntry(NamedTuple):
+    """CMake configuration details for a known library."""
+    pkg: str                                # The exact name used in find_package()
+    targets: Tuple[str, ...]                # Targets to link (e.g., SFML::Graphics)
+    components: Optional[Tuple[str, ...]]   # Specific components (optional)
+    use_config: bool                        # True uses 'CONFIG', False is for system libs (e.g., OpenGL)
+
 # Dictionary mapping lower-case CLI names to CMake configuration details.
-# Schema: "cli_name": (PackageName, [TargetLibraries], [Components], UseConfigMode)
-#   - PackageName: The exact name used in find_package()
-#   - TargetLibraries: List of targets to link (e.g., SFML::Graphics)
-#   - Components: List of specific components (optional)
-#   - UseConfigMode: Boolean. True uses 'CONFIG', False is for system libs (e.g., OpenGL)
+# Schema: "cli_name": LibEntry(pkg, targets, components, use_config)
 KNOWN_TARGETS = {
-    "sfml": ("SFML", ["SFML::Graphics", "SFML::Window", "SFML::System", "SFML::Audio", "SFML::Network"], ["Graphics", "Window", "System", "Audio", "Network"], True),
-    "sdl2": ("SDL2", ["SDL2::SDL2"], None, True),
-    "fmt": ("fmt", ["fmt::fmt"], None, True),
-    "spdlog": ("spdlog", ["spdlog::spdlog"], None, True),
-    "raylib": ("raylib", ["raylib"], None, True),
-    "nlohmann-json": ("nlohmann_json", ["nlohmann_json::nlohmann_json"], None, True),
+    "sfml": LibEntry("SFML", ("SFML::Graphics", "SFML::Window", "SFML::System", "SFML::Audio", "SFML::Network"), ("Graphics", "Window", "System", "Audio", "Network"), True),
+    "sdl2": LibEntry("SDL2", ("SDL2::SDL2",), None, True),
+    "fmt": LibEntry("fmt", ("fmt::fmt",), None, True),
+    "spdlog": LibEntry("spdlog", ("spdlog::spdlog",), None, True),
+    "raylib": LibEntry("raylib", ("raylib",), None, True),
+    "nlohmann-json": LibEntry("nlohmann_json", ("nlohmann_json::nlohmann_json",), None, True),
     
     # OpenGL is treated as a system library, so it does not use CONFIG mode.
-    "opengl": ("OpenGL", ["OpenGL::GL"], None, False),
+    "opengl": LibEntry("OpenGL", ("OpenGL::GL",), None, False),
     
-    "glew": ("GLEW", ["GLEW::GLEW"], None, True),
-    "glfw3": ("glfw3", ["glfw"], None, True),
-    "imgui": ("imgui", ["imgui::imgui"], None, True),
-    "box2d": ("box2d", ["box2d"], None, True),
-    "glm": ("glm", ["glm::glm"], None, True),
+    "glew": LibEntry("GLEW", ("GLEW::GLEW",), None, True),
+    "glfw3": LibEntry("glfw3", ("glfw",), None, True),
+    "imgui": LibEntry("imgui", ("imgui::imgui",), None, True),
+    "box2d": LibEntry("box2d", ("box2d",), None, True),
+    "glm": LibEntry("glm", ("glm::glm",), None, True),
 }
 
+# The CMake snippets are pure functions of the registry, so build them once at import.
+# Schema: "cli_name": (find_package line, target_link_libraries template with {project_name})
+KNOWN_TARGETS_RESOLVED = {
+    name: (
+        f"find_package({entry.pkg} {'CONFIG ' if entry.use_config else ''}REQUIRED"
+        f"{' COMPONENTS ' + ' '.join(entry.components) if entry.components else ''})",
+        f"target_link_libraries({{project_name}} PRIVATE {' '.join(entry.targets)})",
+    )
+    for name, entry in KNOWN_TARGETS.items()
+}
+
+# ---------------- Project Templates ----------------
+# Static scaffolding files, pre-encoded so init can write them as raw bytes.
+MAIN_CPP_TEMPLATE = b'#include <iostream>\n\nint main() {\n    std::cout << "Hello from PAIN!\\n";\n    return 0;\n}\n'
+
+# CMakeLists.txt with injection markers ({name} is the project name)
+CMAKE_TEMPLATE = """cmake_minimum_required(VERSION 3.21)
+project({name})
+set(CMAKE_CXX_STANDARD 20)
+set(CMAKE_CXX_STANDARD_REQUIRED ON)
+add_executable({name} src/main.cpp)
+# --- PAIN DEPENDENCIES START ---
+# --- PAIN DEPENDENCIES END ---
+"""
+
+# A robust .gitignore
+GITIGNORE_TEMPLATE = b"""build/
+vcpkg_installed/
+.vscode/
+.vs/
+*.user
+*.exe
+*.dll
+*.pdb
+*.tmp
+__pycache__/
+"""
+
 # ---------------- User Experience (Visual Feedback) ----------------
 class Spinner:
     """
-    A threaded loading spinner to indicate active background processes.
+    A loading spinner to indicate active background processes.
     Used during long-running tasks like compilation or downloads.
+    Frames are drawn by the caller via spin(), so there is only ever one writer to stdout.
+    On non-TTY output the animation is skipped and a single status line is printed instead.
     """
     def __init__(self, message="Processing"):
         self.message = message
-        self.running = False
-        self.thread = None
+        self.frames = itertools.cycle(['|', '/', '-', '\\'])
+        self.tty = sys.stdout.isatty()
+        # Seconds between redraws; None means "don't wake up at all"
+        self.interval = 0.1 if self.tty else None
 
     def spin(self):
-        spinner = itertools.cycle(['|', '/', '-', '\\'])
-        while self.running:
-            sys.stdout.write(f'\r{self.message}... {next(spinner)} ')
-            sys.stdout.flush()
-            time.sleep(0.1)
-        # Clear the line when finished
-        sys.stdout.write(f'\r{" " * (len(self.message) + 10)}\r')
+        """Draws the next animation frame."""
+        if not self.tty: return
+        sys.stdout.write(f'\r{self.message}... {next(self.frames)} ')
         sys.stdout.flush()
 
     def __enter__(self):
-        self.running = True
-        self.thread = threading.Thread(target=self.spin)
-        self.thread.start()
+        # Flush now, the caller is about to block on the child for the whole task
+        if not self.tty: print(f"{self.message}...", flush=True)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.running = False
-        if self.thread:
-            self.thread.join()
+        if not self.tty: return
+        # Clear the line when finished
+        sys.stdout.write(f'\r{" " * (len(self.message) + 10)}\r')
+        sys.stdout.flush()
 
 # ---------------- Helper Functions ----------------
 def run(cmd, cwd=None, check=True, env=None, msg=None):
@@ -102,30 +166,48 @@ def run(cmd, cwd=None, check=True, env=None, msg=None):
     If 'msg' is None, it prints the command and streams stdout.
     """
     if msg:
-        with Spinner(msg):
+        with Spinner(msg) as spinner:
+            process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+            # Animate on the main thread, waking once per frame (no spinner thread).
+            # Popen.wait(timeout=...) busy-polls with backoff on POSIX, so poll()/sleep() instead.
             try:
-                if check: subprocess.check_call(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
-                else: subprocess.call(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
-            except subprocess.CalledProcessError as e:
-                print(f"\n{STATUS_FAIL} Task failed. Re-running to show error details...")
-                subprocess.call(cmd, cwd=cwd, env=env)
-                raise e
+                if spinner.interval is None:
+                    process.wait()
+                else:
+                    while process.poll() is None:
+                        spinner.spin()
+                        time.sleep(spinner.interval)
+            except BaseException:
+                # e.g. Ctrl+C: don't leave vcpkg/cmake running orphaned in the background
+                process.kill()
+                process.wait()
+                raise
+        if check and process.returncode != 0:
+            print(f"\n{STATUS_FAIL} Task failed. Re-running to show error details...", flush=True)
+            subprocess.call(cmd, cwd=cwd, env=env)
+            raise subprocess.CalledProcessError(process.returncode, cmd)
     else:
-        print(f"{C_CYAN}->{C_RESET} {' '.join(str(c) for c in cmd)}")
+        # Flush our own (possibly block-buffered) output before the child takes over stdio
+        print(f"{C_CYAN}->{C_RESET} {' '.join(str(c) for c in cmd)}", flush=True)
         if check: subprocess.check_call(cmd, cwd=cwd, env=env)
         else: subprocess.call(cmd, cwd=cwd, env=env)
 
+@functools.lru_cache(maxsize=None)
 def command_exists(cmd):
-    """Checks if a binary exists in the system PATH."""
+    """Checks if a binary exists in the system PATH (memoized per process)."""
     return shutil.which(cmd) is not None
 
+@functools.lru_cache(maxsize=None)
 def get_command_version(cmd, flag="--version"):
-    """Attempts to retrieve the version string of a command."""
+    """Attempts to retrieve the version string of a command (memoized per process)."""
     try:
-        output = subprocess.check_output([cmd, flag], stderr=subprocess.STDOUT).decode().strip()
+        # Buffered pipes, and a timeout so a compiler waiting on stdin can't stall us
+        res = subprocess.run([cmd, flag], capture_output=True, text=True, bufsize=-1, timeout=5)
+        # A failing tool counts as missing, rather than reporting its error text as a version
+        if res.returncode != 0: return None
         # Return only the first line of the version output
-        return output.split('\n')[0]
-    except:
+        return (res.stdout or res.stderr).strip().partition('\n')[0].strip() or None
+    except (OSError, subprocess.SubprocessError, UnicodeDecodeError):
         return None
 
 def fatal(msg):
@@ -133,11 +215,34 @@ def fatal(msg):
     print(f"\n{STATUS_FAIL} Error: {msg}")
     sys.exit(1)
 
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """
+    Atomically replaces 'path' with 'data', skipping the write entirely when the
+    contents are already identical (keeps mtimes stable for CMake and file watchers).
+    Returns True if the file was written.
+    """
+    if path.exists() and path.read_bytes() == data: return False
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+def dump_json(data) -> bytes:
+    """Serializes a vcpkg.json document the way PAIN writes it to disk."""
+    if orjson: return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    # ensure_ascii=False matches orjson byte-for-byte, so switching backends doesn't rewrite files
+    return (json.dumps(data, indent=2, ensure_ascii=False) + "\n").encode()
+
+def load_json(path: Path):
+    """Parses a JSON file straight from its raw bytes."""
+    data = path.read_bytes()
+    return orjson.loads(data) if orjson else json.loads(data)
+
 def validate_project_name_fs(name: str) -> bool:
     """Ensures the project name is valid for the file system (no special chars)."""
     if not name: return False
     # Allow alphanumeric, underscore, hyphen
-    if not re.match(r'^[a-zA-Z0-9_-]+$', name): return False
+    if not _NAME_RE.match(name): return False
     if name.startswith('-') or name.startswith('.'): return False
     return True
 
@@ -154,8 +259,13 @@ def doctor():
     print(f"PAIN Doctor - Checking System Health...\n")
     all_good = True
 
+    # Spawn every '--version' probe at once so the child processes overlap, then report in order
+    probes = ["git", "cmake", "vcpkg"] + (["g++"] if _IS_WINDOWS else [])
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        versions = dict(zip(probes, pool.map(get_command_version, probes)))
+
     # 1. Check Git (Required for vcpkg cloning)
-    git_ver = get_command_version("git")
+    git_ver = versions["git"]
     if git_ver:
         print(f"{STATUS_OK} Git found: {git_ver}")
     else:
@@ -163,7 +273,7 @@ def doctor():
         all_good = False
 
     # 2. Check CMake (Required for build generation)
-    cmake_ver = get_command_version("cmake")
+    cmake_ver = versions["cmake"]
     if cmake_ver:
         print(f"{STATUS_OK} CMake found: {cmake_ver}")
     else:
@@ -171,8 +281,8 @@ def doctor():
         all_good = False
 
     # 3. Check vcpkg status
-    if command_exists("vcpkg"):
-        vcpkg_ver = get_command_version("vcpkg")
+    vcpkg_ver = versions["vcpkg"]
+    if vcpkg_ver:
         print(f"{STATUS_OK} vcpkg found: {vcpkg_ver}")
     else:
         # Inform the user that PAIN handles local installation if global is missing
@@ -185,15 +295,14 @@ def doctor():
          print(f"{STATUS_WARN} Ninja not found (Builds might be slower, MSVC/Make will be used)")
 
     # 5. Check for a valid C++ Compiler
-    system = platform.system()
     compiler_found = False
     
-    if system == "Windows":
+    if _IS_WINDOWS:
         if command_exists("cl"): 
             print(f"{STATUS_OK} MSVC (cl.exe) found")
             compiler_found = True
         if command_exists("g++"):
-            gpp_ver = get_command_version("g++")
+            gpp_ver = versions["g++"]
             print(f"{STATUS_OK} MinGW (g++) found: {gpp_ver}")
             compiler_found = True
     else:
@@ -211,6 +320,7 @@ def doctor():
     print(f"\n{STATUS_OK} System is ready for development.")
 
 # ---------------- Vcpkg Internal Management ----------------
+@functools.lru_cache(maxsize=1)
 def get_vcpkg_root() -> Path:
     """Resolves the VCPKG root directory (Env Var > Internal Global Path)."""
     env_root = os.environ.get("VCPKG_ROOT")
@@ -223,46 +333,96 @@ def ensure_vcpkg():
     in the .pain directory.
     """
     vcpkg_root = get_vcpkg_root()
-    exe_name = "vcpkg.exe" if platform.system() == "Windows" else "vcpkg"
-    vcpkg_exe_path = vcpkg_root / exe_name
-
-    if vcpkg_exe_path.exists(): return
+    if vcpkg_exe().exists(): return
 
     print(f"{STATUS_INFO} Global vcpkg not found. Installing to {vcpkg_root}...")
     if not vcpkg_root.parent.exists(): vcpkg_root.parent.mkdir(parents=True)
 
     if not vcpkg_root.exists():
         try:
-            run(["git", "clone", "--depth", "1", VCPKG_REPO, "vcpkg"], 
-                cwd=vcpkg_root.parent, msg="Downloading vcpkg core")
+            clone_vcpkg(vcpkg_root)
         except subprocess.CalledProcessError:
             if vcpkg_root.exists(): shutil.rmtree(vcpkg_root, ignore_errors=True)
             fatal("Failed to clone vcpkg. Check internet connection.")
 
     try:
         msg = "Bootstrapping vcpkg"
-        script = "bootstrap-vcpkg.bat" if platform.system() == "Windows" else "bootstrap-vcpkg.sh"
+        script = "bootstrap-vcpkg.bat" if _IS_WINDOWS else "bootstrap-vcpkg.sh"
         run([str(vcpkg_root / script)], cwd=vcpkg_root, msg=msg)
     except subprocess.CalledProcessError:
         fatal("Failed to bootstrap vcpkg.")
     
     print(f"{STATUS_OK} vcpkg installed successfully.")
 
+def git_version() -> tuple:
+    """Returns the installed git version as (major, minor), or (0, 0) if unknown."""
+    match = _VERSION_RE.search(get_command_version("git") or "")
+    return (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+
+def clone_vcpkg(vcpkg_root: Path):
+    """
+    Clones vcpkg into 'vcpkg_root'. On git >= 2.25 a blobless, sparse clone is used so
+    only the directories PAIN needs are downloaded; older git falls back to a shallow clone.
+    """
+    if git_version() < (2, 25):
+        run(["git", "clone", "--depth", "1", VCPKG_REPO, vcpkg_root.name],
+            cwd=vcpkg_root.parent, msg="Downloading vcpkg core")
+        return
+
+    run(["git", "clone", "--depth", "1", "--filter=blob:none", "--no-checkout", VCPKG_REPO, vcpkg_root.name],
+        cwd=vcpkg_root.parent, msg="Downloading vcpkg core")
+    git = ["git", "-C", str(vcpkg_root)]
+    run(git + ["sparse-checkout", "init", "--cone"], msg="Configuring sparse checkout")
+    run(git + ["sparse-checkout", "set"] + VCPKG_SPARSE_DIRS, msg="Selecting vcpkg directories")
+    run(git + ["checkout"], msg="Checking out vcpkg")
+
+@functools.lru_cache(maxsize=1)
 def vcpkg_exe() -> Path:
     """Returns the path to the vcpkg executable."""
-    return get_vcpkg_root() / ("vcpkg.exe" if platform.system() == "Windows" else "vcpkg")
+    return get_vcpkg_root() / ("vcpkg.exe" if _IS_WINDOWS else "vcpkg")
 
+@functools.lru_cache(maxsize=1)
 def detect_triplet() -> str:
     """Detects the appropriate vcpkg triplet based on the OS and available compiler."""
-    system = platform.system()
-    if system == "Windows":
+    if _IS_WINDOWS:
         if command_exists("cl"): return "x64-windows"
         elif command_exists("g++") or command_exists("mingw32-make"): return "x64-mingw-dynamic"
         elif command_exists("clang++"): return "x64-windows"
         else: fatal("No C++ compiler found.")
-    elif system == "Linux": return "x64-linux"
-    elif system == "Darwin": return "x64-osx"
-    else: fatal(f"Unsupported platform: {system}")
+    elif _SYSTEM == "Linux": return "x64-linux"
+    elif _SYSTEM == "Darwin": return "x64-osx"
+    else: fatal(f"Unsupported platform: {_SYSTEM}")
+
+def file_contains(path: Path, needles, chunk_size=64 * 1024) -> set:
+    """
+    Streams a file in binary chunks and returns the subset of 'needles' (bytes) found in it.
+    Stops reading as soon as every needle has been seen; avoids decoding the whole file.
+    """
+    found = set()
+    overlap = max(len(n) for n in needles) - 1
+    tail = b""
+    with open(path, "rb") as f:
+        while len(found) < len(needles):
+            chunk = f.read(chunk_size)
+            if not chunk: break
+            window = tail + chunk
+            found.update(n for n in needles if n not in found and window.find(n) != -1)
+            # Keep a small overlap so matches spanning chunk boundaries are not missed
+            tail = window[-overlap:] if overlap else b""
+    return found
+
+@functools.lru_cache(maxsize=None)
+def vcpkg_env(triplet: str) -> types.MappingProxyType:
+    """
+    Returns the process environment with vcpkg's root and default triplets set.
+    Memoized per triplet and read-only, so callers copy it to add their own variables.
+    """
+    return types.MappingProxyType({
+        **os.environ,
+        "VCPKG_ROOT": str(get_vcpkg_root()),
+        "VCPKG_DEFAULT_TRIPLET": triplet,
+        "VCPKG_DEFAULT_HOST_TRIPLET": triplet,
+    })
 
 def cleanup_bad_vcpkg_config(project_root: Path):
     """
@@ -272,25 +432,32 @@ def cleanup_bad_vcpkg_config(project_root: Path):
     config_path = project_root / "vcpkg-configuration.json"
     if config_path.exists():
         try:
-            data = json.loads(config_path.read_text())
+            data = load_json(config_path)
             if "default-triplet" in data: config_path.unlink()
         except: config_path.unlink()
     
     cmake_cache = project_root / "build" / "CMakeCache.txt"
     if cmake_cache.exists():
-        content = cmake_cache.read_text()
-        if "VCPKG_TARGET_TRIPLET" in content and detect_triplet() not in content:
+        marker, triplet = b"VCPKG_TARGET_TRIPLET", detect_triplet().encode()
+        found = file_contains(cmake_cache, (marker, triplet))
+        if marker in found and triplet not in found:
              print(f"{STATUS_WARN} Triplets changed, cleaning build directory...")
              shutil.rmtree(project_root / "build", ignore_errors=True)
 
 # ---------------- Project Management ----------------
+def has_manifest(directory) -> bool:
+    """Checks for a vcpkg.json in 'directory' with a single stat() call."""
+    try:
+        os.stat(os.path.join(directory, "vcpkg.json"))
+        return True
+    except OSError:
+        return False
+
 def find_project_root() -> Path:
     """Recursively searches up the directory tree for a vcpkg.json file."""
     current = Path.cwd()
-    if (current / "vcpkg.json").exists(): return current
-    for parent in current.parents:
-        if (parent / "vcpkg.json").exists(): return parent
-    return None
+    if has_manifest(current): return current
+    return next((parent for parent in current.parents if has_manifest(parent)), None)
 
 def init_project(name: str):
     """Scaffolds a new C++ project with standard directory structure."""
@@ -301,44 +468,20 @@ def init_project(name: str):
     if root.exists(): fatal(f"Directory '{name}' already exists")
 
     print(f"{STATUS_INFO} Creating project '{name}'")
-    root.mkdir()
-    (root / "src").mkdir()
-    (root / "build").mkdir()
+    (root / "build").mkdir(parents=True)
 
-    # Create Hello World main.cpp
-    (root / "src" / "main.cpp").write_text(
-        '#include <iostream>\n\nint main() {\n    std::cout << "Hello from PAIN!\\n";\n    return 0;\n}\n'
-    )
-    
-    # Create vcpkg.json
+    # Every scaffolding file, keyed by its path relative to the project root
     safe_name = sanitize_vcpkg_name(name)
-    (root / "vcpkg.json").write_text(json.dumps({
-        "name": safe_name, "version-string": "0.1.0", "dependencies": []
-    }, indent=2))
-    
-    # Create CMakeLists.txt with injection markers
-    cmake_content = f"""cmake_minimum_required(VERSION 3.21)
-project({name})
-set(CMAKE_CXX_STANDARD 20)
-set(CMAKE_CXX_STANDARD_REQUIRED ON)
-add_executable({name} src/main.cpp)
-# --- PAIN DEPENDENCIES START ---
-# --- PAIN DEPENDENCIES END ---
-"""
-    (root / "CMakeLists.txt").write_text(cmake_content)
-    
-    # Create a robust .gitignore
-    gitignore = """build/
-vcpkg_installed/
-.vscode/
-.vs/
-*.user
-*.exe
-*.dll
-*.pdb
-__pycache__/
-"""
-    (root / ".gitignore").write_text(gitignore)
+    templates = {
+        "src/main.cpp": MAIN_CPP_TEMPLATE,
+        "vcpkg.json": dump_json({"name": safe_name, "version-string": "0.1.0", "dependencies": []}),
+        "CMakeLists.txt": CMAKE_TEMPLATE.format(name=name).encode(),
+        ".gitignore": GITIGNORE_TEMPLATE,
+    }
+    for rel, data in templates.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
 
     print(f"{STATUS_OK} Project '{name}' initialized successfully")
 
@@ -346,8 +489,12 @@ __pycache__/
 def normalize_lib_name(lib: str) -> str:
     return lib.split('[')[0].strip()
 
-def add_library(lib: str, auto_link: bool = True):
-    """Adds a library to vcpkg.json and installs it."""
+def add_library(libs, auto_link: bool = True):
+    """
+    Adds one or more libraries to vcpkg.json and installs them.
+    All libraries are installed by a single vcpkg run.
+    """
+    if isinstance(libs, str): libs = [libs]
     root = find_project_root()
     if root is None: fatal("Not in a PAIN project.")
     
@@ -356,33 +503,35 @@ def add_library(lib: str, auto_link: bool = True):
 
     # 1. Update vcpkg.json
     vcpkg_json_path = root / "vcpkg.json"
-    data = json.loads(vcpkg_json_path.read_text())
+    data = load_json(vcpkg_json_path)
     deps = data.get("dependencies", [])
-    lib_base = normalize_lib_name(lib)
+    added = []
+
+    for lib in libs:
+        lib_base = normalize_lib_name(lib)
+        if not any(normalize_lib_name(d if isinstance(d, str) else d.get("name", "")) == lib_base for d in deps):
+            deps.append(lib)
+            added.append(lib)
 
-    if not any(normalize_lib_name(d if isinstance(d, str) else d.get("name", "")) == lib_base for d in deps):
-        deps.append(lib)
+    if added:
         data["dependencies"] = deps
-        vcpkg_json_path.write_text(json.dumps(data, indent=2) + "\n")
-        print(f"{STATUS_OK} Added {lib} to vcpkg.json")
+        write_if_changed(vcpkg_json_path, dump_json(data))
+        for lib in added: print(f"{STATUS_OK} Added {lib} to vcpkg.json")
 
     # 2. Run vcpkg install
     vcpkg_cmd = vcpkg_exe()
     triplet = detect_triplet()
-    env = os.environ.copy()
-    env['VCPKG_ROOT'] = str(get_vcpkg_root())
-    env['VCPKG_DEFAULT_TRIPLET'] = triplet
-    env['VCPKG_DEFAULT_HOST_TRIPLET'] = triplet
+    # Triplets come from VCPKG_DEFAULT_TRIPLET / VCPKG_DEFAULT_HOST_TRIPLET in the env
+    env = vcpkg_env(triplet)
 
     run([
         str(vcpkg_cmd), "install",
-        "--triplet", triplet,
-        "--host-triplet", triplet,
         "--x-install-root", str(root / "vcpkg_installed"),
-    ], cwd=root, env=env, msg=f"Installing {lib} dependencies ({triplet})")
+    ], cwd=root, env=env, msg=f"Installing {', '.join(libs)} dependencies ({triplet})")
 
     # 3. Inject CMake code
-    if auto_link: link_library(lib_base, silent=True)
+    if auto_link:
+        for lib in libs: link_library(normalize_lib_name(lib), silent=True)
 
 def link_library(lib: str, silent: bool = False):
     """Injects find_package and target_link_libraries into CMakeLists.txt."""
@@ -390,8 +539,8 @@ def link_library(lib: str, silent: bool = False):
     if root is None: fatal("Not in a PAIN project.")
 
     cmake_path = root / "CMakeLists.txt"
-    content = cmake_path.read_text()
-    project_name = re.search(r'project\((\w+)\)', content).group(1)
+    content = cmake_path.read_text(encoding="utf-8") # Must match the UTF-8 encode on write
+    project_name = _PROJECT_RE.search(content).group(1)
     lib_lower = lib.lower()
 
     # Default logic (assumes CONFIG mode is required)
@@ -399,35 +548,32 @@ def link_library(lib: str, silent: bool = False):
     link_libs = f"target_link_libraries({project_name} PRIVATE {lib}::{lib})"
 
     # Check Registry for specialized linking rules
-    if lib_lower in KNOWN_TARGETS:
-        val = KNOWN_TARGETS[lib_lower]
-        pkg_name, targets, components = val[:3]
-        use_config = val[3] if len(val) > 3 else True
-
-        target_str = " ".join(targets)
-        comp_str = f"COMPONENTS {' '.join(components)}" if components else ""
-        
-        # Toggle CONFIG keyword based on registry
-        config_kw = "CONFIG" if use_config else ""
-        find_pkg = f"find_package({pkg_name} {config_kw} REQUIRED {comp_str})"
-        find_pkg = find_pkg.replace("  ", " ") # Clean up double spaces
-        
-        link_libs = f"target_link_libraries({project_name} PRIVATE {target_str})"
+    if lib_lower in KNOWN_TARGETS_RESOLVED:
+        find_pkg, link_template = KNOWN_TARGETS_RESOLVED[lib_lower]
+        link_libs = link_template.format(project_name=project_name)
 
     # Injection Strategy: Find markers and append logic
     start_marker = "# --- PAIN DEPENDENCIES START ---"
     end_marker = "# --- PAIN DEPENDENCIES END ---"
     
+    start = content.find(start_marker)
+    end = content.find(end_marker, start) if start != -1 else -1
+
     # Create markers if missing
-    if start_marker not in content: content += f"\n{start_marker}\n{end_marker}\n"
+    if end == -1:
+        content += f"\n{start_marker}\n{end_marker}\n"
+        start = content.rfind(start_marker)
+        end = content.rfind(end_marker)
     
-    # Avoid duplicate linking
-    if find_pkg in content: return
-
-    pre, post = content.split(start_marker)
-    block, rest = post.split(end_marker)
-    new_block = block + f"\n{find_pkg}\n{link_libs}"
-    cmake_path.write_text(pre + start_marker + new_block + end_marker + rest)
+    # Avoid duplicate linking (only the dependency block needs scanning).
+    # Match on "find_package(<Pkg> " so lines written by older PAIN versions are recognized too.
+    if find_pkg.partition(" ")[0] + " " in content[start:end]: return
+
+    # Splice the new lines in just before the end marker. Older PAIN versions left the
+    # marker glued to the previous line, so start a fresh line when needed.
+    lead = "" if content[end - 1] == "\n" else "\n"
+    new_content = content[:end] + f"{lead}{find_pkg}\n{link_libs}\n" + content[end:]
+    write_if_changed(cmake_path, new_content.encode())
     print(f"{STATUS_OK} Linked {lib} in CMakeLists.txt")
 
 # ---------------- CLI Features ----------------
@@ -436,7 +582,7 @@ def list_dependencies():
     root = find_project_root()
     if not root: fatal("Not in a PAIN project.")
     
-    data = json.loads((root / "vcpkg.json").read_text())
+    data = load_json(root / "vcpkg.json")
     print(f"\n{C_CYAN}Project Dependencies:{C_RESET}")
     deps = data.get("dependencies", [])
     
@@ -454,9 +600,9 @@ def open_project():
     if not root: fatal("Not in a PAIN project.")
     
     print(f"{STATUS_INFO} Opening project folder...")
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         os.startfile(root)
-    elif platform.system() == "Darwin": # macOS
+    elif _SYSTEM == "Darwin": # macOS
         subprocess.call(["open", str(root)])
     else: # Linux
         subprocess.call(["xdg-open", str(root)])
@@ -464,7 +610,7 @@ def open_project():
 # ---------------- Build Process ----------------
 def detect_cmake_generator() -> str:
     """Selects the best available CMake generator (Ninja > MinGW > Unix Makefiles)."""
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         if command_exists("ninja"): return "Ninja"
         if command_exists("cl"): return "NMake Makefiles"
         if command_exists("mingw32-make"): return "MinGW Makefiles"
@@ -485,17 +631,14 @@ def build_project(config="Debug"):
     triplet = detect_triplet()
     generator = detect_cmake_generator()
 
-    env = os.environ.copy()
-    env['VCPKG_ROOT'] = str(vcpkg_root)
-    env['VCPKG_DEFAULT_TRIPLET'] = triplet
-    env['VCPKG_DEFAULT_HOST_TRIPLET'] = triplet
+    env = vcpkg_env(triplet)
     
-    # Force MinGW environment variables if detected on Windows
+    # Force MinGW environment variables if detected on Windows (copy, the base env is read-only)
     if triplet == "x64-mingw-dynamic":
         if command_exists("x86_64-w64-mingw32-gcc"):
-            env['CC'], env['CXX'] = 'x86_64-w64-mingw32-gcc', 'x86_64-w64-mingw32-g++'
+            env = {**env, 'CC': 'x86_64-w64-mingw32-gcc', 'CXX': 'x86_64-w64-mingw32-g++'}
         elif command_exists("gcc"):
-            env['CC'], env['CXX'] = 'gcc', 'g++'
+            env = {**env, 'CC': 'gcc', 'CXX': 'g++'}
 
     cmake_cmd = [
         "cmake", "-S", str(root), "-B", str(build_dir),
@@ -510,27 +653,43 @@ def build_project(config="Debug"):
     run(["cmake", "--build", str(build_dir), "--config", config], env=env, msg="Compiling Project")
     print(f"{STATUS_OK} Build complete ({config})")
 
+def find_executable(build_dir: Path, exe_name: str) -> Path:
+    """
+    Locates the built executable in build/ or, for multi-config generators, build/<Config>/.
+    Reads build/ once with scandir instead of stat-ing every candidate path.
+    """
+    try:
+        with os.scandir(build_dir) as it: entries = {e.name: e for e in it}
+    except OSError: return None
+
+    entry = entries.get(exe_name)
+    if entry and entry.is_file(): return Path(entry.path)
+
+    # Only look inside the config directories that actually exist
+    for config in ("Debug", "Release"):
+        sub = entries.get(config)
+        if sub and sub.is_dir():
+            candidate = Path(sub.path) / exe_name
+            if candidate.is_file(): return candidate
+    return None
+
 def run_project(args=[]):
     """Finds the built executable and runs it."""
     root = find_project_root()
-    data = json.loads((root / "vcpkg.json").read_text())
+    data = load_json(root / "vcpkg.json")
     
     # Determine executable name from CMake logic or vcpkg name
-    cmake_content = (root / "CMakeLists.txt").read_text()
-    match = re.search(r'project\((\w+)\)', cmake_content)
+    cmake_content = (root / "CMakeLists.txt").read_text(encoding="utf-8")
+    match = _PROJECT_RE.search(cmake_content)
     exe_base = match.group(1) if match else data["name"]
     
-    exe_name = exe_base + (".exe" if platform.system() == "Windows" else "")
+    exe_name = exe_base + (".exe" if _IS_WINDOWS else "")
     
-    possible_paths = [
-        root / "build" / exe_name,
-        root / "build" / "Debug" / exe_name,
-        root / "build" / "Release" / exe_name
-    ]
-    exe_path = next((p for p in possible_paths if p.exists()), None)
+    exe_path = find_executable(root / "build", exe_name)
     if not exe_path: fatal(f"Executable not found. Run 'pain build' first.")
 
-    print(f"{STATUS_INFO} Running {exe_name}...")
+    # Flush before the program inherits stdio, so this line isn't printed after its output
+    print(f"{STATUS_INFO} Running {exe_name}...", flush=True)
     subprocess.run([str(exe_path)] + args)
 
 def clean_project():
@@ -547,7 +706,7 @@ def print_help():
     print("\nUsage: pain <command> [args]")
     print("\nCommands:")
     print("  init <name>       Create a new project")
-    print("  add <lib>         Add dependency (e.g. pain add sfml)")
+    print("  add <lib>...      Add dependencies (e.g. pain add sfml fmt)")
     print("  list              List installed dependencies")
     print("  build [conf]      Build project (default: Debug)")
     print("  run [-- args]     Run the built executable")
@@ -561,7 +720,7 @@ def main():
     cmd = sys.argv[1]
     
     if cmd == "init" and len(sys.argv) >= 3: init_project(sys.argv[2])
-    elif cmd == "add" and len(sys.argv) >= 3: add_library(sys.argv[2])
+    elif cmd == "add" and len(sys.argv) >= 3: add_library(sys.argv[2:])
     elif cmd == "build": build_project(sys.argv[2] if len(sys.argv) > 2 else "Debug")
     elif cmd == "run": 
         # Support passing arguments to the C++ app
@@ -574,12 +733,12 @@ def main():
     elif cmd == "remove" and len(sys.argv) >= 3:
         root = find_project_root()
         vcpkg_json = root / "vcpkg.json"
-        data = json.loads(vcpkg_json.read_text())
+        data = load_json(vcpkg_json)
         lib_base = normalize_lib_name(sys.argv[2])
         # Filter out the requested library
         data["dependencies"] = [d for d in data.get("dependencies", []) 
                                 if normalize_lib_name(d if isinstance(d, str) else d.get("name", "")) != lib_base]
-        vcpkg_json.write_text(json.dumps(data, indent=2))
+        write_if_changed(vcpkg_json, dump_json(data))
         print(f"{STATUS_OK} Removed {sys.argv[2]}")
     elif cmd == "doctor": doctor()
     elif cmd in ["--help", "-h", "help"]: print_help()